@@ -1,282 +1,68 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import serial
-import serial.tools.list_ports
-from typing import List, Optional
+from typing import List, Optional, Union
 import logging
-import os
-import subprocess
-import platform
-import time
 
-class Constants:
+import serial_common
+from serial_common import SerialManager, ValidationHelper, LogManager, ConfirmDialog, MainThreadDispatcher
+
+class Constants(serial_common.Constants):
     WINDOW_TITLE = "Serial PWM Sender"
-    SERIAL_BAUDRATE = 115200
-    SERIAL_TIMEOUT = 1
-    PWM_MIN_VALUE = -25000
-    PWM_MAX_VALUE = 25000
-    CAN_ID_MIN = 1
-    CAN_ID_MAX = 4
-    PWM_COUNT = 4
-    ENTRY_WIDTH = 20
-    COMBO_WIDTH = 20
-    LOG_FILE_NAME = "serial_gui.log"
 
-class SerialManager:
-    
-    def __init__(self):
-        self.serial_connection: Optional[serial.Serial] = None
-    
-    def get_available_ports(self) -> List[str]:
-        try:
-            ports = serial.tools.list_ports.comports()
-            return [port.device for port in ports]
-        except Exception as e:
-            logging.error(f"Failed to get serial ports: {e}")
-            return []
-    
-    def open_connection(self, port: str) -> bool:
-        if not port:
-            return False
-        
-        try:
-            self.close_connection()
-            self.serial_connection = serial.Serial(
-                port, 
-                Constants.SERIAL_BAUDRATE, 
-                timeout=Constants.SERIAL_TIMEOUT
-            )
-            return True
-        except Exception as e:
-            logging.error(f"Failed to open serial connection: {e}")
-            return False
-    
-    def close_connection(self):
-        if self.serial_connection and self.serial_connection.is_open:
-            self.serial_connection.close()
-    
-    def send_command(self, command: str) -> bool:
-        if not self.serial_connection or not self.serial_connection.is_open:
-            return False
-        
-        try:
-            self.serial_connection.write(command.encode())
-            return True
-        except Exception as e:
-            logging.error(f"Failed to send command: {e}")
-            return False
+# コマンドの書式は固定なので、bytesのテンプレートをモジュール読み込み時に一度だけ作っておく
+_PWM_TMPL = b",".join(b"p%d:%%d" % i for i in range(Constants.PWM_COUNT))
 
-class ValidationHelper:
-    
-    @staticmethod
-    def validate_can_id(can_id: str) -> tuple[bool, Optional[int], str]:
-        try:
-            cid = int(can_id.strip())
-            if Constants.CAN_ID_MIN <= cid <= Constants.CAN_ID_MAX:
-                return True, cid, ""
-            else:
-                return False, None, f"CAN ID out of range ({Constants.CAN_ID_MIN}-{Constants.CAN_ID_MAX})"
-        except ValueError:
-            return False, None, "Invalid CAN ID (must be integer)"
-    
-    @staticmethod
-    def validate_pwm_value(value: str) -> tuple[bool, Optional[int], str]:
-        try:
-            v = int(value.strip())
-            if Constants.PWM_MIN_VALUE <= v <= Constants.PWM_MAX_VALUE:
-                return True, v, ""
-            else:
-                return False, None, f"Value out of range ({Constants.PWM_MIN_VALUE}~{Constants.PWM_MAX_VALUE})"
-        except ValueError:
-            return False, None, "Invalid value (must be integer)"
-    
-    @staticmethod
-    def validate_pwm_values(values: List[str]) -> tuple[bool, Optional[List[int]], str]:
-        pwm_values = []
-        for i, value in enumerate(values):
-            is_valid, pwm_value, error_msg = ValidationHelper.validate_pwm_value(value)
-            if not is_valid:
-                return False, None, f"PWM[{i}]: {error_msg}"
-            pwm_values.append(pwm_value)
-        return True, pwm_values, ""
-
-class LogManager:
-    
-    def __init__(self):
-        self.log_file_path = Constants.LOG_FILE_NAME
-        self.log_enabled = tk.BooleanVar(value=True)
-        self.file_handler = None
-        self.setup_logging()
-    
-    def ensure_log_file_handler(self):
-        if self.log_enabled.get() and (self.file_handler is None or not os.path.exists(self.log_file_path)):
-            self.add_file_handler()
-    
-    def setup_logging(self):
-        for handler in logging.root.handlers[:]:
-            logging.root.removeHandler(handler)
-        
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[logging.StreamHandler()]
-        )
-        
-        if self.log_enabled.get():
-            self.add_file_handler()
-    
-    def add_file_handler(self):
-        try:
-            if self.file_handler:
-                logging.getLogger().removeHandler(self.file_handler)
-                self.file_handler.close()
-            
-            self.file_handler = logging.FileHandler(self.log_file_path)
-            self.file_handler.setFormatter(
-                logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-            )
-            logging.getLogger().addHandler(self.file_handler)
-        except Exception as e:
-            print(f"Failed to create log file: {e}")
-    
-    def remove_file_handler(self):
-        if self.file_handler:
-            try:
-                logging.getLogger().removeHandler(self.file_handler)
-                self.file_handler.close()
-                self.file_handler = None
-            except Exception as e:
-                print(f"Failed to remove file handler: {e}")
-    
-    def toggle_log_file(self):
-        if self.log_enabled.get():
-            self.add_file_handler()
-            logging.info("Log file enabled")
-        else:
-            self.remove_file_handler()
-            logging.info("Log file disabled")
-    
-    def open_log_file(self) -> bool:
-        if not os.path.exists(self.log_file_path):
-            messagebox.showwarning("Warning", "Log file does not exist.")
-            return False
-        
-        try:
-            system = platform.system()
-            if system == "Windows":
-                os.startfile(self.log_file_path)
-            elif system == "Darwin":
-                subprocess.run(["open", self.log_file_path])
-            else:
-                subprocess.run(["xdg-open", self.log_file_path])
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to open log file: {e}")
-            return False
-    
-    def clear_log_file(self) -> bool:
-        self.ensure_log_file_handler()  # ファイルハンドラがなければ追加
-        if not os.path.exists(self.log_file_path):
-            # ファイルがなければ新規作成
-            try:
-                with open(self.log_file_path, 'w') as f:
-                    f.write('')
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to create log file: {e}")
-                return False
-        try:
-            self.remove_file_handler()
-            with open(self.log_file_path, 'w') as f:
-                f.write('')
-            if self.log_enabled.get():
-                self.add_file_handler()
-            logging.info("Log file cleared")
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to clear log file: {e}")
-            if self.log_enabled.get():
-                self.add_file_handler()
-            return False
-    
-    def delete_log_file(self) -> bool:
-        if not os.path.exists(self.log_file_path):
-            messagebox.showwarning("Warning", "Log file does not exist.")
-            return False
-        
-        try:
-            self.remove_file_handler()
-            logging.shutdown()  # 追加: 全てのハンドラを閉じる
-            time.sleep(0.1)
-            try:
-                with open(self.log_file_path, 'r') as f:
-                    pass
-            except PermissionError:
-                messagebox.showerror("Error", "Log file is being used by another process. Please close any applications that might be using the log file.")
-                if self.log_enabled.get():
-                    self.add_file_handler()
-                return False
-
-            os.remove(self.log_file_path)
-            return True
-        except PermissionError as e:
-            messagebox.showerror("Error", f"Permission denied: {e}\nThe log file might be open in another application.")
-            if self.log_enabled.get():
-                self.add_file_handler()
-            return False
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete log file: {e}")
-            if self.log_enabled.get():
-                self.add_file_handler()
-            return False
-    
-    def get_log_file_size(self) -> str:
-        if os.path.exists(self.log_file_path):
-            size = os.path.getsize(self.log_file_path)
-            if size < 1024:
-                return f"{size} B"
-            elif size < 1024 * 1024:
-                return f"{size / 1024:.1f} KB"
-            else:
-                return f"{size / (1024 * 1024):.1f} MB"
-        return "N/A"
+# 固定の制御コマンドはエンコード済みのbytesで持っておく
+_CMD_START = b"i"
+_CMD_STOP = b"o"
 
 class SerialSenderGUI:    
     def __init__(self, root: tk.Tk):
         self.root = root
         self.root.title(Constants.WINDOW_TITLE)
         
-        self.serial_manager = SerialManager()
+        # ワーカースレッドからの結果はこれを通してメインスレッドで処理する
+        self._dispatcher = MainThreadDispatcher(self.root)
+        self.serial_manager = SerialManager(on_error=self._post_error)
         self.log_manager = LogManager()
         self.status_var = tk.StringVar()
+        self._last_status = ""
         
         self._init_gui_components()
         self._setup_layout()
+        self._confirm_dialog = ConfirmDialog(self.root)
+        self._load_ports()
+        
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.root.after(Constants.LOG_CHECK_INTERVAL_MS, self._periodic_log_check)
+        self.root.after(Constants.LOG_SIZE_REFRESH_MS, self._periodic_log_size_refresh)
     
     def _init_gui_components(self):
         self.port_label = ttk.Label(self.root, text="Serial Port:")
+        # ポート一覧は起動時にバックグラウンドで取得しておき、ドロップダウンにはキャッシュを表示する
         self.port_combo = ttk.Combobox(
             self.root, 
-            values=self.serial_manager.get_available_ports(), 
-            width=Constants.COMBO_WIDTH
+            values=[], 
+            width=Constants.COMBO_WIDTH,
+            postcommand=self._on_port_dropdown
         )
         self.refresh_btn = ttk.Button(self.root, text="Refresh", command=self._refresh_ports)
         
-        self.canid_label = ttk.Label(self.root, text=f"CAN ID ({Constants.CAN_ID_MIN}-{Constants.CAN_ID_MAX}):")
-        self.canid_entry = ttk.Entry(self.root, width=Constants.ENTRY_WIDTH)
-        self.canid_entry.insert(0, str(Constants.CAN_ID_MIN))
-        self.set_canid_btn = ttk.Button(self.root, text="Set CAN ID", command=self._set_canid)
+        self.canid_widgets = self._mk_entry_row(
+            self.root,
+            f"CAN ID ({Constants.CAN_ID_MIN}-{Constants.CAN_ID_MAX}):",
+            str(Constants.CAN_ID_MIN),
+            "Set CAN ID",
+            self._set_canid
+        )
+        self.canid_label, self.canid_entry, self.set_canid_btn = self.canid_widgets
         
         self.pwm_frame = ttk.LabelFrame(self.root, text="Individual PWM Values", padding="5")
-        self.pwm_entries = []
-        self.pwm_labels = []
-        
-        for i in range(Constants.PWM_COUNT):
-            label = ttk.Label(self.pwm_frame, text=f"PWM[{i}]:")
-            self.pwm_labels.append(label)
-            
-            entry = ttk.Entry(self.pwm_frame, width=15)
-            entry.insert(0, "0")
-            self.pwm_entries.append(entry)
+        self.pwm_widgets = [
+            (ttk.Label(self.pwm_frame, text=f"PWM[{i}]:"), self._mk_entry(self.pwm_frame, "0", 15))
+            for i in range(Constants.PWM_COUNT)
+        ]
+        self.pwm_entries = [entry for _, entry in self.pwm_widgets]
         
         self.send_all_pwm_btn = ttk.Button(
             self.pwm_frame, 
@@ -284,16 +70,18 @@ class SerialSenderGUI:
             command=self._send_all_pwm
         )
         
-        self.value_label = ttk.Label(
-            self.root, 
-            text=f"Set All PWM ({Constants.PWM_MIN_VALUE}~{Constants.PWM_MAX_VALUE}):"
+        self.value_widgets = self._mk_entry_row(
+            self.root,
+            f"Set All PWM ({Constants.PWM_MIN_VALUE}~{Constants.PWM_MAX_VALUE}):",
+            "",
+            "Send All",
+            self._send_value
         )
-        self.value_entry = ttk.Entry(self.root, width=Constants.ENTRY_WIDTH)
-        self.send_value_btn = ttk.Button(self.root, text="Send All", command=self._send_value)
+        self.value_label, self.value_entry, self.send_value_btn = self.value_widgets
         
         self.control_frame = ttk.LabelFrame(self.root, text="Control", padding="5")
-        self.i_btn = ttk.Button(self.control_frame, text="Start (i)", command=lambda: self._send_cmd('i'))
-        self.o_btn = ttk.Button(self.control_frame, text="Stop (o)", command=lambda: self._send_cmd('o'))
+        self.i_btn = ttk.Button(self.control_frame, text="Start (i)", command=lambda: self._send_cmd(_CMD_START))
+        self.o_btn = ttk.Button(self.control_frame, text="Stop (o)", command=lambda: self._send_cmd(_CMD_STOP))
         
         self.log_frame = ttk.LabelFrame(self.root, text="Log Management", padding="5")
         
@@ -319,26 +107,42 @@ class SerialSenderGUI:
         
         self.status_label = ttk.Label(self.root, textvariable=self.status_var, foreground="blue")
     
+    @staticmethod
+    def _mk_entry(parent, text: str, width: int) -> ttk.Entry:
+        entry = ttk.Entry(parent, width=width)
+        entry.insert(0, text)
+        return entry
+    
+    @classmethod
+    def _mk_entry_row(cls, parent, label_text: str, text: str, btn_text: str, command):
+        # ラベル/入力欄/ボタンの3点セットをまとめて作る
+        return (
+            ttk.Label(parent, text=label_text),
+            cls._mk_entry(parent, text, Constants.ENTRY_WIDTH),
+            ttk.Button(parent, text=btn_text, command=command),
+        )
+    
+    @staticmethod
+    def _grid_row(row: int, widgets):
+        for col, widget in enumerate(widgets):
+            widget.grid(row=row, column=col, padx=5, pady=5)
+    
     def _setup_layout(self):
         self.port_label.grid(row=0, column=0, padx=5, pady=5)
         self.port_combo.grid(row=0, column=1, padx=5, pady=5)
         self.refresh_btn.grid(row=0, column=2, padx=5, pady=5)
         
-        self.canid_label.grid(row=1, column=0, padx=5, pady=5)
-        self.canid_entry.grid(row=1, column=1, padx=5, pady=5)
-        self.set_canid_btn.grid(row=1, column=2, padx=5, pady=5)
+        self._grid_row(1, self.canid_widgets)
         
         self.pwm_frame.grid(row=2, column=0, columnspan=3, padx=5, pady=5, sticky="ew")
         
-        for i in range(Constants.PWM_COUNT):
-            self.pwm_labels[i].grid(row=i//2, column=(i%2)*2, padx=5, pady=2)
-            self.pwm_entries[i].grid(row=i//2, column=(i%2)*2+1, padx=5, pady=2)
+        for i, (label, entry) in enumerate(self.pwm_widgets):
+            label.grid(row=i//2, column=(i%2)*2, padx=5, pady=2)
+            entry.grid(row=i//2, column=(i%2)*2+1, padx=5, pady=2)
         
         self.send_all_pwm_btn.grid(row=2, column=0, columnspan=4, padx=5, pady=5)
         
-        self.value_label.grid(row=3, column=0, padx=5, pady=5)
-        self.value_entry.grid(row=3, column=1, padx=5, pady=5)
-        self.send_value_btn.grid(row=3, column=2, padx=5, pady=5)
+        self._grid_row(3, self.value_widgets)
         
         self.log_frame.grid(row=4, column=0, columnspan=3, padx=5, pady=5, sticky="ew")
         
@@ -356,9 +160,27 @@ class SerialSenderGUI:
         
         self._refresh_log_size()
     
+    def _on_port_dropdown(self):
+        # postcommandの後すぐに一覧が表示されるため、キャッシュ済みの一覧を同期的に入れ、
+        # 最新の一覧は次に開いたときのためにバックグラウンドで取得する
+        self.port_combo['values'] = self.serial_manager.get_cached_ports()
+        self._load_ports()
+    
+    def _load_ports(self):
+        self.serial_manager.get_available_ports_async(
+            lambda ports: self._dispatcher.post(self._set_ports, ports)
+        )
+    
     def _refresh_ports(self):
-        self.port_combo['values'] = self.serial_manager.get_available_ports()
-        self._update_status("Port list refreshed")
+        self.serial_manager.get_available_ports_async(
+            lambda ports: self._dispatcher.post(self._set_ports, ports, "Port list refreshed"),
+            force=True
+        )
+    
+    def _set_ports(self, ports: List[str], message: Optional[str] = None):
+        self.port_combo['values'] = ports
+        if message:
+            self._update_status(message)
     
     def _set_canid(self):
         canid = self.canid_entry.get()
@@ -368,7 +190,7 @@ class SerialSenderGUI:
             self._show_error(error_msg)
             return
         
-        if self._execute_serial_operation(f"c{cid}"):
+        if self._execute_serial_operation(b"c%d" % cid):
             self._update_status(f"Set CAN ID: {cid}")
     
     def _send_all_pwm(self):
@@ -379,10 +201,11 @@ class SerialSenderGUI:
             self._show_error(error_msg)
             return
         
-        pwm_cmd = f"p0:{values[0]},p1:{values[1]},p2:{values[2]},p3:{values[3]}"
+        pwm_cmd = _PWM_TMPL % tuple(values)
         
-        if self._execute_serial_operation(pwm_cmd):
-            self._update_status(f"Sent PWM values: {values}")
+        # 値の更新は新しいものが届けば古いものは不要なので、送信が詰まったら捨ててよい
+        if self._execute_serial_operation(pwm_cmd, droppable=True):
+            self._update_status(f"Sent PWM values: {values.tolist()}")
     
     def _send_value(self):
         value = self.value_entry.get()
@@ -392,49 +215,56 @@ class SerialSenderGUI:
             self._show_error(error_msg)
             return
         
-        if self._execute_serial_operation(f"{v}"):
+        if self._execute_serial_operation(b"%d" % v, droppable=True):
             self._update_status(f"Sent value: {v}")
     
-    def _send_cmd(self, cmd: str):
-        if self._execute_serial_operation(cmd):
-            self._update_status(f"Sent command: {cmd}")
+    def _send_cmd(self, cmd: bytes):
+        # 開始/停止は連打されても毎回送る
+        if self._execute_serial_operation(cmd, force=True):
+            self._update_status(f"Sent command: {cmd.decode()}")
     
-    def _execute_serial_operation(self, command: str) -> bool:
+    def _execute_serial_operation(self, command: Union[str, bytes], force: bool = False,
+                                  droppable: bool = False) -> bool:
         port = self.port_combo.get()
         if not port:
             self._show_error("Select a serial port.")
             return False
         
-        if not self.serial_manager.open_connection(port):
-            self._show_error("Failed to open serial connection.")
+        # オープン/書き込みの失敗は書き込みスレッドからon_error経由で通知される
+        if isinstance(command, bytes):
+            sent = self.serial_manager.send_bytes(port, command, force, droppable)
+        else:
+            sent = self.serial_manager.send_command(port, command, force, droppable)
+        if not sent:
+            self._show_error("Failed to send command.")
             return False
-        
-        try:
-            success = self.serial_manager.send_command(command)
-            if not success:
-                self._show_error("Failed to send command.")
-                return False
-            return True
-        finally:
-            self.serial_manager.close_connection()
+        return True
+    
+    def _set_status(self, text: str):
+        # 表示内容が変わらない場合はStringVarの更新(再描画)を省く
+        if text != self._last_status:
+            self._last_status = text
+            self.status_var.set(text)
     
     def _update_status(self, message: str):
-        self.log_manager.ensure_log_file_handler()
-        self.status_var.set(message)
+        self._set_status(message)
         logging.info(message)
     
     def _show_error(self, message: str):
-        self.log_manager.ensure_log_file_handler()
-        self.status_var.set(f"Error: {message}")
+        self._set_status(f"Error: {message}")
         logging.error(message)
         messagebox.showerror("Error", message)
 
+    def _post_error(self, message: str):
+        # 書き込みスレッドから呼ばれるので、Tkには触らずメインスレッドでの処理に回す
+        self._dispatcher.post(self._show_error, message)
+    
     def _open_log_file(self):
         if self.log_manager.open_log_file():
             self._update_status("Log file opened")
     
     def _clear_log_file(self):
-        if messagebox.askyesno("Confirm", "Are you sure you want to clear the log file?"):
+        if self._confirm_dialog.ask("Confirm", "Are you sure you want to clear the log file?"):
             if self.log_manager.clear_log_file():
                 self._update_status("Log file cleared")
                 self._refresh_log_size()
@@ -443,6 +273,19 @@ class SerialSenderGUI:
         size = self.log_manager.get_log_file_size()
         self.log_size_label.config(text=f"Size: {size}")
 
+    def _periodic_log_check(self):
+        self.log_manager.ensure_log_file_handler(check_file=True)
+        self.root.after(Constants.LOG_CHECK_INTERVAL_MS, self._periodic_log_check)
+    
+    def _periodic_log_size_refresh(self):
+        self._refresh_log_size()
+        self.root.after(Constants.LOG_SIZE_REFRESH_MS, self._periodic_log_size_refresh)
+    
+    def _on_close(self):
+        self.serial_manager.shutdown()
+        self.log_manager.shutdown()
+        self.root.destroy()
+
 def main():
     root = tk.Tk()
     app = SerialSenderGUI(root)
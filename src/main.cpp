@@ -37,39 +37,63 @@ void parse_pwm_command(const char* cmd) {
     delete[] cmd_copy;
 }
 
+void handle_command(char* cmd) {
+    if (cmd[0] == '\0') {
+        return;
+    }
+    
+    if (cmd[0] == 'i') {
+        running = true;
+    } else if (cmd[0] == 'o') {
+        running = false;
+    } else if (cmd[0] == 'c') {
+        // CAN ID設定
+        int new_can_id = atoi(&cmd[1]);
+        if (new_can_id >= 1 && new_can_id <= 4) {
+            can_id = new_can_id;
+        }
+    } else if (cmd[0] == 'p') {
+        // 個別PWM設定
+        parse_pwm_command(cmd);
+    } else {
+        // 一括PWM設定
+        int val = atoi(cmd);
+        if (val >= -25000 && val <= 25000) {
+            set_pwm(val);
+        }
+    }
+}
+
+// 受信中の1行分（改行を受け取るまでコマンドとして実行しない）
+char line[64];
+int line_len = 0;
+bool line_overflow = false;
+
+void feed_byte(char c) {
+    if (c == '\n' || c == '\r') {
+        if (!line_overflow) {
+            line[line_len] = '\0';
+            handle_command(line);
+        }
+        line_len = 0;
+        line_overflow = false;
+    } else if (line_len < (int)sizeof(line) - 1) {
+        line[line_len++] = c;
+    } else {
+        // 長すぎる行は次の改行まで読み捨てる
+        line_overflow = true;
+    }
+}
+
 int main() {
     char buf[64];  // バッファサイズを増加
     while (1) {
         // シリアル受信
         if (pc.readable()) {
-            int len = pc.read(buf, sizeof(buf) - 1);
-            if (len > 0) {
-                buf[len] = '\0';
-                
-                if (buf[len-1] == '\n' || buf[len-1] == '\r') {
-                    buf[len-1] = '\0';
-                }
-                
-                if (buf[0] == 'i') {
-                    running = true;
-                } else if (buf[0] == 'o') {
-                    running = false;
-                } else if (buf[0] == 'c') {
-                    // CAN ID設定
-                    int new_can_id = atoi(&buf[1]);
-                    if (new_can_id >= 1 && new_can_id <= 4) {
-                        can_id = new_can_id;
-                    }
-                } else if (buf[0] == 'p') {
-                    // 個別PWM設定
-                    parse_pwm_command(buf);
-                } else {
-                    // 一括PWM設定
-                    int val = atoi(buf);
-                    if (val >= -25000 && val <= 25000) {
-                        set_pwm(val);
-                    }
-                }
+            // 1回のreadで行の途中までしか届かないことがあるので、読んだ分は行バッファに溜めて改行ごとに処理する
+            int len = pc.read(buf, sizeof(buf));
+            for (int i = 0; i < len; i++) {
+                feed_byte(buf[i]);
             }
         }
         // ボタン押下で停止
@@ -0,0 +1,605 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import serial
+import serial.tools.list_ports
+from typing import Callable, Deque, Iterable, List, Optional, Union
+import logging
+import logging.handlers
+import atexit
+import contextlib
+import os
+import subprocess
+import platform
+import time
+import queue
+import collections
+import array
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ログファイルを開く関数はOSごとに一度だけ決めておく(ビューアの起動は待たない)
+_SYSTEM = platform.system()
+if _SYSTEM == "Windows":
+    _OPEN_LOG_FN = os.startfile
+elif _SYSTEM == "Darwin":
+    _OPEN_LOG_FN = lambda path: subprocess.Popen(["open", path])
+else:
+    _OPEN_LOG_FN = lambda path: subprocess.Popen(["xdg-open", path])
+
+_LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# ファイルハンドラをこのレベルにすると何も書き込まれない
+_LOG_DISABLED_LEVEL = logging.CRITICAL + 1
+
+# 入力欄の整数判定。前後の空白を許し、不正な入力でも例外を発生させずに判定する
+# (桁数は範囲判定に十分な分だけ許す。int()の桁数上限を超える入力で例外にならないように)
+_INT_MATCH = re.compile(r'\s*([+-]?\d{1,9})\s*').fullmatch
+
+# 検証成功時のエラーメッセージ（毎回同じオブジェクトを返す）
+_OK_MSG = ""
+
+# 書き込みスレッドの終了指示
+_TX_STOP = object()
+
+class Constants:
+    WINDOW_TITLE = "Serial Motor Controller"
+    SERIAL_BAUDRATE = 115200
+    SERIAL_TIMEOUT = 1
+    SERIAL_LATENCY_TIMER_MS = 1
+    SERIAL_RX_BUFFER_SIZE = 4096
+    # 送信キューの上限。溢れたら古い値更新コマンドを捨てて最新を優先する
+    SERIAL_TX_QUEUE_SIZE = 8
+    # 終了時に書き込みスレッドが残りのコマンドを送り終えるのを待つ最大秒数
+    SERIAL_SHUTDOWN_TIMEOUT = 0.5
+    # 同じコマンドがこの秒数以内に続いた場合は送らない(ダブルクリック対策)
+    SERIAL_DEDUP_WINDOW = 0.05
+    PWM_MIN_VALUE = -25000
+    PWM_MAX_VALUE = 25000
+    ROBOMAS_MIN_VALUE = -10000
+    ROBOMAS_MAX_VALUE = 10000
+    CAN_ID_MIN = 1
+    CAN_ID_MAX = 4
+    PWM_COUNT = 4
+    ROBOMAS_COUNT = 8
+    ENTRY_WIDTH = 20
+    COMBO_WIDTH = 20
+    # コマンドの終端文字（ファームウェアは改行を受け取った時点で1コマンドとして処理する）
+    COMMAND_DELIMITER = b"\n"
+    # まとめて書き込む最大バイト数（ファームウェアの受信バッファbuf[64]に収める）
+    SERIAL_COALESCE_MAX_BYTES = 63
+    LOG_FILE_NAME = "serial_gui.log"
+    PORT_CACHE_TTL = 2.0
+    LOG_CHECK_INTERVAL_MS = 5000
+    # 他スレッドからGUIへの通知を取り出す間隔
+    UI_POLL_INTERVAL_MS = 50
+    LOG_SIZE_REFRESH_MS = 2000
+    LOG_DELETE_ATTEMPTS = 5
+    LOG_DELETE_RETRY_MS = 20
+
+class SerialManager:
+    
+    def __init__(self, on_error: Optional[Callable[[str], None]] = None):
+        self.serial_connection: Optional[serial.Serial] = None
+        self._ports_cache: Optional[List[str]] = None
+        self._ports_cache_ts: float = 0.0
+        self._on_error = on_error
+        self._last_cmd: Optional[tuple[str, bytes]] = None
+        self._last_cmd_ts: float = 0.0
+        
+        # ポートのオープンと書き込みは専用スレッドで行い、GUIスレッドをブロックしない
+        # (serial_connectionはこのスレッドだけが触る)
+        # キューの要素は(ポート, データ, 捨ててよいか)。古い値更新を途中から取り除くため、dequeを自前のConditionで守る
+        self._tx_q: Deque[Union[tuple[str, bytes, bool], object]] = collections.deque()
+        self._tx_cv = threading.Condition()
+        self._tx_thread = threading.Thread(target=self._tx_loop, daemon=True)
+        self._tx_thread.start()
+        
+        # ポート列挙もバックグラウンドで行う
+        self._port_exec = ThreadPoolExecutor(max_workers=1)
+    
+    def get_available_ports(self, force: bool = False) -> List[str]:
+        # ポート列挙はWindowsで遅いため、TTL内はキャッシュを返す
+        if (not force and self._ports_cache is not None
+                and time.monotonic() - self._ports_cache_ts < Constants.PORT_CACHE_TTL):
+            return list(self._ports_cache)
+        
+        try:
+            ports = serial.tools.list_ports.comports()
+            self._ports_cache = [port.device for port in ports]
+            self._ports_cache_ts = time.monotonic()
+            return list(self._ports_cache)
+        except Exception as e:
+            logging.error(f"Failed to get serial ports: {e}")
+            return []
+    
+    def get_cached_ports(self) -> List[str]:
+        # 最後に取得したポート一覧（列挙は行わない）
+        return list(self._ports_cache or [])
+    
+    def get_available_ports_async(self, callback: Callable[[List[str]], None], force: bool = False):
+        # callbackはワーカースレッドから呼ばれる(Tkを直接触らず、MainThreadDispatcher経由で渡すこと)
+        future = self._port_exec.submit(self.get_available_ports, force)
+        future.add_done_callback(lambda f: callback(f.result()))
+    
+    def open_connection(self, port: str) -> bool:
+        if not port:
+            return False
+        
+        # 同じポートが開いていれば再オープンしない
+        sc = self.serial_connection
+        if sc is not None and sc.is_open and sc.port == port:
+            return True
+        
+        try:
+            self.close_connection()
+            self.serial_connection = serial.Serial(
+                port, 
+                Constants.SERIAL_BAUDRATE, 
+                timeout=Constants.SERIAL_TIMEOUT
+            )
+            # 以前の接続で残った古いデータを捨てる
+            self.serial_connection.reset_input_buffer()
+            self.serial_connection.reset_output_buffer()
+            self._tune_latency(port)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to open serial connection: {e}")
+            return False
+    
+    def _tune_latency(self, port: str):
+        # USBシリアル変換(FTDI等)のlatency_timerは既定16msなので、可能なら短くする
+        if _SYSTEM == "Linux":
+            name = os.path.basename(os.path.realpath(port))
+            timer_path = f"/sys/bus/usb-serial/devices/{name}/latency_timer"
+            try:
+                with open(timer_path, 'w') as f:
+                    f.write(str(Constants.SERIAL_LATENCY_TIMER_MS))
+            except OSError as e:
+                logging.info(f"Could not set latency timer for {port}: {e}")
+            # ttyのASYNC_LOW_LATENCYフラグを立てる (TIOCGSERIAL/TIOCSSERIAL)
+            try:
+                self.serial_connection.set_low_latency_mode(True)
+            except (ValueError, AttributeError) as e:
+                logging.info(f"Could not enable low latency mode for {port}: {e}")
+        elif _SYSTEM == "Windows":
+            try:
+                self.serial_connection.set_buffer_size(rx_size=Constants.SERIAL_RX_BUFFER_SIZE)
+            except Exception as e:
+                logging.info(f"Could not set buffer size for {port}: {e}")
+    
+    def close_connection(self):
+        if self.serial_connection and self.serial_connection.is_open:
+            self.serial_connection.close()
+    
+    @staticmethod
+    def _encode_command(command: Union[str, bytes, Iterable[Union[str, bytes]]]) -> bytes:
+        if isinstance(command, bytes):
+            return command
+        if isinstance(command, str):
+            return command.encode()
+        # 複数コマンドは区切り文字で連結し、1つのバッファにまとめて1回のwriteで送る
+        return Constants.COMMAND_DELIMITER.join(part if isinstance(part, bytes) else part.encode() for part in command)
+    
+    def send_command(self, port: str, command: Union[str, bytes, Iterable[Union[str, bytes]]],
+                     force: bool = False, droppable: bool = False) -> bool:
+        try:
+            data = self._encode_command(command)
+        except Exception as e:
+            logging.error(f"Failed to send command: {e}")
+            return False
+        return self.send_bytes(port, data, force, droppable)
+    
+    def send_bytes(self, port: str, data: bytes, force: bool = False, droppable: bool = False) -> bool:
+        # エンコード済みのbytesはそのままキューに積む
+        # droppable: 後続の値更新で上書きされる値コマンド（キューが溢れたときに捨ててよい）
+        if not port:
+            return False
+        
+        # 直前と同じコマンドが短時間に続いたら送ったことにして捨てる(forceなら必ず送る)
+        cmd = (port, data)
+        now = time.monotonic()
+        if not force and cmd == self._last_cmd and now - self._last_cmd_ts < Constants.SERIAL_DEDUP_WINDOW:
+            return True
+        self._last_cmd, self._last_cmd_ts = cmd, now
+        
+        return self._enqueue((port, data, droppable))
+    
+    def _enqueue(self, item) -> bool:
+        # 連打でUARTの送信が追いつかない場合は、最も古い値更新コマンドを捨てて最新を積む
+        # CAN ID変更や開始/停止などは捨てない。捨てられる値更新がなければ待たずに失敗を返す
+        with self._tx_cv:
+            if len(self._tx_q) >= Constants.SERIAL_TX_QUEUE_SIZE and not self._drop_oldest_value():
+                logging.error("Send queue is full")
+                return False
+            self._tx_q.append(item)
+            self._tx_cv.notify()
+        return True
+    
+    def _drop_oldest_value(self) -> bool:
+        # _tx_cvを取得した状態で呼ぶこと
+        for i, queued in enumerate(self._tx_q):
+            if queued is not _TX_STOP and queued[2]:
+                del self._tx_q[i]
+                return True
+        return False
+    
+    def shutdown(self):
+        self._port_exec.shutdown(wait=False)
+        # 終了指示は上限に関係なく最後に積み、積まれているコマンド(停止など)は捨てない
+        with self._tx_cv:
+            self._tx_q.append(_TX_STOP)
+            self._tx_cv.notify()
+        self._tx_thread.join(timeout=Constants.SERIAL_SHUTDOWN_TIMEOUT)
+    
+    def _report_error(self, message: str):
+        # 通知に失敗しても書き込みスレッドは止めない
+        if self._on_error:
+            try:
+                self._on_error(message)
+            except Exception as e:
+                logging.error(f"Failed to report error: {e}")
+    
+    def _tx_loop(self):
+        while True:
+            with self._tx_cv:
+                while not self._tx_q:
+                    self._tx_cv.wait()
+                item = self._tx_q.popleft()
+                if item is _TX_STOP:
+                    break
+                
+                # 各コマンドは終端文字付きで送り、前回の書き込み中に溜まった
+                # 同じポート宛てのコマンドは上限バイト数まで連結して1回で書き込む
+                port, data, _ = item
+                pending = bytearray(data)
+                pending += Constants.COMMAND_DELIMITER
+                while self._tx_q:
+                    queued = self._tx_q[0]
+                    if (queued is _TX_STOP or queued[0] != port
+                            or len(pending) + len(queued[1]) + len(Constants.COMMAND_DELIMITER)
+                            > Constants.SERIAL_COALESCE_MAX_BYTES):
+                        break
+                    self._tx_q.popleft()
+                    pending += queued[1]
+                    pending += Constants.COMMAND_DELIMITER
+            
+            try:
+                self._write(port, bytes(pending))
+            except Exception as e:
+                # 想定外の例外でも書き込みスレッドを終了させない
+                logging.error(f"Unexpected error in serial writer: {e}")
+        
+        self.close_connection()
+    
+    def _write(self, port: str, data: bytes):
+        if not self.open_connection(port):
+            self._report_error("Failed to open serial connection.")
+            return
+        
+        try:
+            self.serial_connection.write(data)
+        except serial.SerialException as e:
+            # ポートが抜かれた等。一度だけ開き直して再送する
+            logging.warning(f"Write failed, reconnecting: {e}")
+            self.close_connection()
+            try:
+                if not self.open_connection(port):
+                    raise serial.SerialException("reconnect failed")
+                self.serial_connection.write(data)
+            except Exception as e:
+                logging.error(f"Failed to send command: {e}")
+                # 次回のコマンドで開き直す
+                self.close_connection()
+                self._report_error("Failed to send command.")
+        except Exception as e:
+            logging.error(f"Failed to send command: {e}")
+            self._report_error("Failed to send command.")
+
+class ValidationHelper:
+    
+    @staticmethod
+    def validate_can_id(can_id: str) -> tuple[bool, Optional[int], str]:
+        m = _INT_MATCH(can_id)
+        if m is None:
+            return False, None, "Invalid CAN ID (must be integer)"
+        cid = int(m.group(1))
+        if Constants.CAN_ID_MIN <= cid <= Constants.CAN_ID_MAX:
+            return True, cid, _OK_MSG
+        else:
+            return False, None, f"CAN ID out of range ({Constants.CAN_ID_MIN}-{Constants.CAN_ID_MAX})"
+    
+    @staticmethod
+    def validate_pwm_value(value: str) -> tuple[bool, Optional[int], str]:
+        m = _INT_MATCH(value)
+        if m is None:
+            return False, None, "Invalid value (must be integer)"
+        v = int(m.group(1))
+        if Constants.PWM_MIN_VALUE <= v <= Constants.PWM_MAX_VALUE:
+            return True, v, _OK_MSG
+        else:
+            return False, None, f"Value out of range ({Constants.PWM_MIN_VALUE}~{Constants.PWM_MAX_VALUE})"
+    
+    @staticmethod
+    def validate_robomas_value(value: str) -> tuple[bool, Optional[int], str]:
+        m = _INT_MATCH(value)
+        if m is None:
+            return False, None, "Invalid value (must be integer)"
+        v = int(m.group(1))
+        if Constants.ROBOMAS_MIN_VALUE <= v <= Constants.ROBOMAS_MAX_VALUE:
+            return True, v, _OK_MSG
+        else:
+            return False, None, f"Value out of range ({Constants.ROBOMAS_MIN_VALUE}~{Constants.ROBOMAS_MAX_VALUE})"
+    
+    @staticmethod
+    def _validate_int_list(values: List[str], lo: int, hi: int, name: str) -> tuple[bool, Optional[array.array], str]:
+        # 結果はint配列(array)として先に確保し、1回のループで変換と範囲判定を行う(失敗したら即return)
+        out = array.array('i', [0]) * len(values)
+        for i, value in enumerate(values):
+            m = _INT_MATCH(value)
+            if m is None:
+                return False, None, f"{name}[{i}]: Invalid value (must be integer)"
+            v = int(m.group(1))
+            if not (lo <= v <= hi):
+                return False, None, f"{name}[{i}]: Value out of range ({lo}~{hi})"
+            out[i] = v
+        return True, out, _OK_MSG
+    
+    @staticmethod
+    def validate_pwm_values(values: List[str]) -> tuple[bool, Optional[array.array], str]:
+        return ValidationHelper._validate_int_list(
+            values,
+            Constants.PWM_MIN_VALUE,
+            Constants.PWM_MAX_VALUE,
+            "PWM"
+        )
+    
+    @staticmethod
+    def validate_robomas_values(values: List[str]) -> tuple[bool, Optional[array.array], str]:
+        return ValidationHelper._validate_int_list(
+            ["0" if not value or value.isspace() else value for value in values],  # 空の値は0として扱う
+            Constants.ROBOMAS_MIN_VALUE,
+            Constants.ROBOMAS_MAX_VALUE,
+            "Robomas"
+        )
+
+class LogManager:
+    
+    def __init__(self):
+        self.log_file_path = Constants.LOG_FILE_NAME
+        self.log_enabled = tk.BooleanVar(value=True)
+        self.file_handler = None
+        self._handler_valid = False
+        self._listener = None
+        self.setup_logging()
+        atexit.register(self.shutdown)
+    
+    def ensure_log_file_handler(self, check_file: bool = False):
+        # 通常はハンドラの状態フラグだけを見る。check_file=Trueのときのみstatで外部削除を確認する
+        # (フラグが立っていればTk変数の読み出しもせずに戻る)
+        if self._handler_valid and not check_file:
+            return
+        if not self.log_enabled.get():
+            return
+        if not self._handler_valid or not os.path.exists(self.log_file_path):
+            self.add_file_handler()
+    
+    def setup_logging(self):
+        logging.root.handlers.clear()
+        logging.root.setLevel(logging.INFO)
+        
+        # ルートロガーにはQueueHandlerだけを付け、実際の出力はQueueListenerのスレッドで行う
+        log_queue = queue.SimpleQueue()
+        logging.root.addHandler(logging.handlers.QueueHandler(log_queue))
+        
+        self.stream_handler = logging.StreamHandler()
+        self.stream_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+        self._listener = logging.handlers.QueueListener(
+            log_queue, self.stream_handler, respect_handler_level=True
+        )
+        self._listener.start()
+        
+        if self.log_enabled.get():
+            self.add_file_handler()
+    
+    @contextlib.contextmanager
+    def _listener_paused(self):
+        # リスナーを止めてキューに溜まったレコードを書き出させ、その間にファイル操作を行う
+        # (止めている間のレコードはキューに溜まり、再開後に書き出される)
+        if self._listener:
+            self._listener.stop()
+        try:
+            yield
+        finally:
+            if self._listener:
+                self._listener.start()
+    
+    def add_file_handler(self):
+        with self._listener_paused():
+            self._detach_file_handler()
+            self._attach_file_handler()
+    
+    def remove_file_handler(self):
+        with self._listener_paused():
+            self._detach_file_handler()
+    
+    def _attach_file_handler(self):
+        try:
+            # ファイルへの書き込みはQueueListenerのスレッドで行われる
+            self.file_handler = logging.FileHandler(self.log_file_path)
+            self.file_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+            self._listener.handlers = (self.stream_handler, self.file_handler)
+            self._handler_valid = True
+        except Exception as e:
+            print(f"Failed to create log file: {e}")
+    
+    def _detach_file_handler(self):
+        self._handler_valid = False
+        if self.file_handler:
+            try:
+                self._listener.handlers = (self.stream_handler,)
+                self.file_handler.close()
+                self.file_handler = None
+            except Exception as e:
+                print(f"Failed to remove file handler: {e}")
+    
+    def shutdown(self):
+        # キューに残ったレコードを書き出してからリスナーを止める
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+    
+    def toggle_log_file(self):
+        # ハンドラは付けたままにし、レベルだけで有効/無効を切り替える(ファイルを開き直さない)
+        if self.log_enabled.get():
+            if self.file_handler:
+                self.file_handler.setLevel(logging.NOTSET)
+            else:
+                self.add_file_handler()
+            logging.info("Log file enabled")
+        else:
+            if self.file_handler:
+                self.file_handler.setLevel(_LOG_DISABLED_LEVEL)
+            logging.info("Log file disabled")
+    
+    def open_log_file(self) -> bool:
+        # まだキューにあるレコードを書き出してから開く
+        with self._listener_paused():
+            pass
+        if not os.path.exists(self.log_file_path):
+            messagebox.showwarning("Warning", "Log file does not exist.")
+            return False
+        
+        try:
+            _OPEN_LOG_FN(self.log_file_path)
+            return True
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open log file: {e}")
+            return False
+    
+    def clear_log_file(self) -> bool:
+        # 古いレコードが切り詰め後に書き込まれないよう、リスナーを止めた状態で行う
+        with self._listener_paused():
+            try:
+                self._detach_file_handler()
+                try:
+                    os.truncate(self.log_file_path, 0)
+                except FileNotFoundError:
+                    # ファイルがなければ新規作成
+                    open(self.log_file_path, 'w').close()
+                ok = True
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to clear log file: {e}")
+                ok = False
+            if self.log_enabled.get():
+                self._attach_file_handler()
+        if ok:
+            logging.info("Log file cleared")
+        return ok
+    
+    def delete_log_file(self, root: tk.Misc, callback: Optional[Callable[[bool], None]] = None) -> bool:
+        # 削除はroot.afterで再試行するので、結果はcallbackで受け取る
+        if not os.path.exists(self.log_file_path):
+            messagebox.showwarning("Warning", "Log file does not exist.")
+            return False
+        
+        self.remove_file_handler()
+        self._try_delete_log_file(root, callback, Constants.LOG_DELETE_ATTEMPTS)
+        return True
+    
+    def _try_delete_log_file(self, root: tk.Misc, callback: Optional[Callable[[bool], None]], attempts_left: int):
+        try:
+            os.remove(self.log_file_path)
+        except PermissionError as e:
+            # Windowsではハンドルの解放が遅れることがあるので、イベントループを止めずに再試行する
+            if attempts_left > 1:
+                root.after(
+                    Constants.LOG_DELETE_RETRY_MS,
+                    self._try_delete_log_file, root, callback, attempts_left - 1
+                )
+                return
+            messagebox.showerror("Error", f"Permission denied: {e}\nThe log file might be open in another application.")
+            self._finish_delete_log_file(callback, False)
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to delete log file: {e}")
+            self._finish_delete_log_file(callback, False)
+            return
+        self._finish_delete_log_file(callback, True)
+    
+    def _finish_delete_log_file(self, callback: Optional[Callable[[bool], None]], success: bool):
+        if not success and self.log_enabled.get():
+            self.add_file_handler()
+        if callback:
+            callback(success)
+    
+    def get_log_file_size(self) -> str:
+        try:
+            size = os.stat(self.log_file_path).st_size
+        except OSError:
+            return "N/A"
+        if size < 1024:
+            return f"{size} B"
+        elif size < 1024 * 1024:
+            return f"{size / 1024:.1f} KB"
+        else:
+            return f"{size / (1024 * 1024):.1f} MB"
+
+class MainThreadDispatcher:
+    # Tkはメインループ外や他スレッドからのroot.after呼び出しで例外を出すことがあるので、
+    # 他スレッドからはキューに積むだけにし、メインスレッドのroot.afterで定期的に取り出して実行する
+    
+    def __init__(self, root: tk.Misc):
+        self.root = root
+        self._q: "queue.SimpleQueue[tuple[Callable[..., None], tuple]]" = queue.SimpleQueue()
+        self.root.after(Constants.UI_POLL_INTERVAL_MS, self._poll)
+    
+    def post(self, fn: Callable[..., None], *args):
+        # どのスレッドから呼んでもよい
+        self._q.put((fn, args))
+    
+    def _poll(self):
+        # 先に次回を予約しておき、コールバックが例外を出しても取り出しを止めない
+        self.root.after(Constants.UI_POLL_INTERVAL_MS, self._poll)
+        while True:
+            try:
+                fn, args = self._q.get_nowait()
+            except queue.Empty:
+                return
+            fn(*args)
+
+class ConfirmDialog:
+    # 確認ダイアログを毎回生成・破棄せず、非表示のToplevelを使い回す
+    
+    def __init__(self, parent: tk.Misc):
+        self.result = tk.BooleanVar(master=parent, value=False)
+        
+        self.window = tk.Toplevel(parent)
+        self.window.withdraw()
+        self.window.transient(parent)
+        self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", lambda: self._answer(False))
+        
+        self.message_label = ttk.Label(self.window, padding="10")
+        self.yes_btn = ttk.Button(self.window, text="Yes", command=lambda: self._answer(True))
+        self.no_btn = ttk.Button(self.window, text="No", command=lambda: self._answer(False))
+        
+        self.message_label.grid(row=0, column=0, columnspan=2, padx=5, pady=5)
+        self.yes_btn.grid(row=1, column=0, padx=5, pady=5)
+        self.no_btn.grid(row=1, column=1, padx=5, pady=5)
+    
+    def ask(self, title: str, message: str) -> bool:
+        self.window.title(title)
+        self.message_label.config(text=message)
+        self.window.deiconify()
+        self.window.grab_set()
+        self.no_btn.focus_set()
+        
+        # Yes/No/閉じるのいずれかでresultが書き込まれるまで待つ
+        self.window.wait_variable(self.result)
+        
+        self.window.grab_release()
+        self.window.withdraw()
+        return self.result.get()
+    
+    def _answer(self, value: bool):
+        self.result.set(value)